@@ -99,6 +99,10 @@ function detectDrugLogos(content: string): string[] {
   return Array.from(detectedLogos);
 }
 
+// Number of trailing messages sent to /api/chat. The server only reads the
+// current question and the previous user question (see formatQuestionWithContext)
+const CHAT_CONTEXT_MESSAGES = 3;
+
 interface ChatMessage {
   role: "user" | "assistant";
   content: string;
@@ -247,12 +251,15 @@ export default function HomePage() {
       // Add the display message to chat
       const updatedMessages = [...prev, userMessageDisplay];
       
-      // Create API messages with enhanced content for the last message
-      const apiMessages = updatedMessages.map((msg, idx) => {
-        if (idx === updatedMessages.length - 1 && msg.role === "user") {
-          return { ...msg, content: apiContent };
+      // Create API messages with enhanced content for the last message.
+      // Only the recent window the server uses for context is sent, with
+      // display-only metadata stripped, so the payload stays bounded
+      const recentMessages = updatedMessages.slice(-CHAT_CONTEXT_MESSAGES);
+      const apiMessages = recentMessages.map((msg, idx): ChatMessage => {
+        if (idx === recentMessages.length - 1 && msg.role === "user") {
+          return { role: msg.role, content: apiContent };
         }
-        return msg;
+        return { role: msg.role, content: msg.content };
       });
       
       // Send enhanced messages to API
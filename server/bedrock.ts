@@ -45,9 +45,17 @@ export interface DenodoAIResponse {
   error?: string;
 }
 
+// Model and source labels reported on every chat response
+const DENODO_AI_MODEL = "Claude via Denodo AI SDK + AWS Bedrock";
+const DENODO_AI_SOURCE = "Denodo AI SDK";
+
 /**
  * Format conversation context for Denodo AI SDK
  * Extracts drug/medication names from context and appends to current question
+ *
+ * NOTE: the client only sends the last 3 messages (CHAT_CONTEXT_MESSAGES in
+ * client/src/pages/home.tsx). Looking further back than messages.length - 3
+ * requires raising that window as well.
  */
 function formatQuestionWithContext(messages: ChatMessage[]): string {
   if (messages.length === 1) {
@@ -87,32 +95,35 @@ function removeAIDisclaimer(answer: string): string {
     .trim();
 }
 
+// Patterns that indicate technical schema responses (not patient-friendly)
+const TECHNICAL_RESPONSE_PATTERNS = [
+  /based on the provided schema/i,
+  /listed in the [`']?[a-z_]+\.[a-z_]+[`']? table/i,
+  /product_and_label_index/i,
+  /ndc_code_0/i,
+  /form_code_0/i,
+  /setid_0/i,
+  /not specifically provided in the sample data/i,
+  /schema sample data/i,
+  /jl_verboomen\./i,
+  /ii_verboomen\./i,
+  /is a product name in the database/i,
+  /no additional details about.*are available from the given result/i,
+  /unfortunately.*no additional details/i,
+  /may need to request a more detailed query/i,
+  /search for additional data fields/i,
+];
+
+// Phrases the Denodo AI SDK uses when it could not find an answer
+const NO_ANSWER_PATTERN = /sorry|can't help|cannot help|couldn't find/i;
+
 /**
  * Filter technical database schema responses and replace with patient-friendly messages
  * Detects when Denodo AI SDK returns technical schema information instead of drug information
  */
 function filterTechnicalResponse(answer: string): string {
-  // Patterns that indicate technical schema responses (not patient-friendly)
-  const technicalPatterns = [
-    /based on the provided schema/i,
-    /listed in the [`']?[a-z_]+\.[a-z_]+[`']? table/i,
-    /product_and_label_index/i,
-    /ndc_code_0/i,
-    /form_code_0/i,
-    /setid_0/i,
-    /not specifically provided in the sample data/i,
-    /schema sample data/i,
-    /jl_verboomen\./i,
-    /ii_verboomen\./i,
-    /is a product name in the database/i,
-    /no additional details about.*are available from the given result/i,
-    /unfortunately.*no additional details/i,
-    /may need to request a more detailed query/i,
-    /search for additional data fields/i,
-  ];
-  
   // Check if response contains technical database language
-  const isTechnicalResponse = technicalPatterns.some(pattern => pattern.test(answer));
+  const isTechnicalResponse = TECHNICAL_RESPONSE_PATTERNS.some(pattern => pattern.test(answer));
   
   if (isTechnicalResponse) {
     console.log('[Response Filter] Detected technical schema response - replacing with patient-friendly message');
@@ -203,6 +214,26 @@ export function getDenodoCredentialsByRole(userRole: string): { username: string
   };
 }
 
+/**
+ * Log the details of a successful Denodo AI SDK response
+ */
+function logDenodoAIResponse(data: DenodoAIResponse, responseTime: number): void {
+  console.log(`[Denodo AI SDK] Response received in ${responseTime}s`);
+  console.log(`[Denodo AI SDK] Tables/Views Used:`, data.tables_used || 'Not specified');
+  console.log(`[Denodo AI SDK] SQL Query:`, data.sql_query || 'Not available');
+  console.log(`[Denodo AI SDK] Answer:`, data.answer);
+}
+
+// Connection pool shared by all HTTPS Denodo AI SDK requests. Idle sockets
+// are closed after 4s, before the SDK server's own idle timeout (uvicorn
+// defaults to 5s), so a request is never sent on a socket the server is closing.
+// Plain http uses Node's global agent, which already keeps sockets alive.
+const denodoAIHttpsAgent = new https.Agent({
+  keepAlive: true,
+  timeout: 4000,
+  rejectUnauthorized: false,
+});
+
 /**
  * Chat with Denodo AI SDK which uses AWS Bedrock internally
  */
@@ -271,34 +302,38 @@ export async function chatWithDenodoAI(
           'Authorization': authHeader,
           'Accept': 'application/json',
         },
-        // Only set agent for HTTPS to handle self-signed certificates
+        // Only set agent for HTTPS: the shared keep-alive agent reuses sockets
+        // (and TLS sessions) across requests and handles self-signed certificates
         ...(urlObj.protocol === 'https:' ? {
-          agent: new https.Agent({ rejectUnauthorized: false })
+          agent: denodoAIHttpsAgent
         } : {})
       };
 
       const requester = urlObj.protocol === 'https:' ? https : http;
       
       const req = requester.request(options, (res: any) => {
-        let responseData = '';
+        // Collect raw chunks and decode once at the end: avoids repeated string
+        // concatenation and splitting multi-byte UTF-8 characters across chunks
+        const responseChunks: Buffer[] = [];
 
-        res.on('data', (chunk: any) => {
-          responseData += chunk;
+        res.on('data', (chunk: Buffer) => {
+          responseChunks.push(chunk);
         });
 
         res.on('end', () => {
           // Guard: prevent multiple terminal calls
           if (settled) return;
           
+          const responseData = Buffer.concat(responseChunks).toString('utf-8');
+          
           const responseTime = (Date.now() - startTime) / 1000;
           
           if (res.statusCode && res.statusCode >= 200 && res.statusCode < 300) {
             try {
               const data = JSON.parse(responseData) as DenodoAIResponse;
-              console.log(`[Denodo AI SDK] Response received in ${responseTime}s`);
-              console.log(`[Denodo AI SDK] Tables/Views Used:`, data.tables_used || 'Not specified');
-              console.log(`[Denodo AI SDK] SQL Query:`, data.sql_query || 'Not available');
-              console.log(`[Denodo AI SDK] Answer:`, data.answer);
+              // Defer the detailed dump until after the promise settles so the
+              // chat response is written before the (potentially large) log lines
+              setImmediate(() => logDenodoAIResponse(data, responseTime));
 
               // Parse tables_used if it's a JSON string
               let tablesUsed: string[] = [];
@@ -318,12 +353,7 @@ export async function chatWithDenodoAI(
                 // RBAC compliance, so we must reject the response to prevent potential data leaks
                 // EXCEPTION: If the AI genuinely couldn't find information (indicated by "Sorry" messages),
                 // pass through without RBAC check since no data was accessed
-                const isNoAnswerResponse = data.answer && (
-                  data.answer.toLowerCase().includes("sorry") ||
-                  data.answer.toLowerCase().includes("can't help") ||
-                  data.answer.toLowerCase().includes("cannot help") ||
-                  data.answer.toLowerCase().includes("couldn't find")
-                );
+                const isNoAnswerResponse = !!data.answer && NO_ANSWER_PATTERN.test(data.answer);
                 
                 if (tablesUsed.length === 0 && !isNoAnswerResponse) {
                   console.error(`[RBAC VIOLATION] Response missing tables_used metadata - cannot verify RBAC compliance`);
@@ -349,9 +379,9 @@ export async function chatWithDenodoAI(
                   settled = true;
                   resolve({
                     message: patientFriendlyMessage,
-                    model: "Claude via Denodo AI SDK + AWS Bedrock",
+                    model: DENODO_AI_MODEL,
                     responseTime,
-                    source: "Denodo AI SDK",
+                    source: DENODO_AI_SOURCE,
                     tablesUsed: [],
                     sqlQuery: data.sql_query,
                     confidence: 50,
@@ -362,9 +392,10 @@ export async function chatWithDenodoAI(
                 
                 // Validate that all queried tables are in the allowed list
                 // Strip schema prefix (e.g., "jl_verboomen.table_name" -> "table_name") for comparison
+                const allowedViewSet = new Set(allowedViews);
                 const unauthorizedViews = tablesUsed.filter(table => {
                   const tableName = table.includes('.') ? table.split('.').pop() || table : table;
-                  return !allowedViews.includes(tableName);
+                  return !allowedViewSet.has(tableName);
                 });
                 
                 if (unauthorizedViews.length > 0) {
@@ -380,9 +411,9 @@ export async function chatWithDenodoAI(
                   settled = true;
                   resolve({
                     message: filteredAnswer + disclaimerText,
-                    model: "Claude via Denodo AI SDK + AWS Bedrock",
+                    model: DENODO_AI_MODEL,
                     responseTime,
-                    source: "Denodo AI SDK",
+                    source: DENODO_AI_SOURCE,
                     tablesUsed,
                     sqlQuery: data.sql_query,
                     confidence: Math.min(95, 70 + (tablesUsed.length * 3)),
@@ -405,9 +436,9 @@ export async function chatWithDenodoAI(
               settled = true; // Mark as settled
               resolve({
                 message: filteredAnswer,
-                model: "Claude via Denodo AI SDK + AWS Bedrock",
+                model: DENODO_AI_MODEL,
                 responseTime,
-                source: "Denodo AI SDK",
+                source: DENODO_AI_SOURCE,
                 tablesUsed,
                 sqlQuery: data.sql_query,
                 confidence,
@@ -464,14 +495,9 @@ export async function testDenodoAIConnection(): Promise<boolean> {
     const denodoAIEndpoint = process.env.DENODO_AI_SDK_URL || "http://localhost:8008";
     const url = `${denodoAIEndpoint}/docs`;
     
-    // Create HTTPS agent that ignores self-signed certificates
-    const httpsAgent = new https.Agent({
-      rejectUnauthorized: false
-    });
-    
     const response = await fetch(url, {
       // @ts-ignore - Node.js fetch supports agent option
-      agent: url.startsWith('https') ? httpsAgent : undefined,
+      agent: url.startsWith('https') ? denodoAIHttpsAgent : undefined,
     });
     return response.ok;
   } catch (error) {
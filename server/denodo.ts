@@ -19,12 +19,19 @@ interface DenodoResponse {
 export class DenodoClient {
   private config: DenodoConfig;
   private authHeader: string;
+  private queryHeaders: Record<string, string>;
 
   constructor(config: DenodoConfig) {
     this.config = config;
     // Create Basic Auth header
     const credentials = Buffer.from(`${config.username}:${config.password}`).toString('base64');
     this.authHeader = `Basic ${credentials}`;
+    // Query headers never change for a client, so build them once and reuse per request
+    this.queryHeaders = {
+      'Authorization': this.authHeader,
+      'Accept': 'application/json',
+      'Content-Type': 'application/json',
+    };
   }
 
   /**
@@ -44,11 +51,7 @@ export class DenodoClient {
     try {
       const response = await fetch(url, {
         method: 'GET',
-        headers: {
-          'Authorization': this.authHeader,
-          'Accept': 'application/json',
-          'Content-Type': 'application/json',
-        },
+        headers: this.queryHeaders,
       });
 
       if (!response.ok) {
@@ -73,13 +76,15 @@ export class DenodoClient {
   async getDrugIndex(viewName: string = 'product_and_label_index'): Promise<DrugIndexEntry[]> {
     try {
       const rows = await this.executeQuery(viewName);
+      // Fallback snapshot date, computed once rather than per row
+      const today = new Date().toISOString().split('T')[0];
       
       // Map Denodo rows to DrugIndexEntry format
       // Adjust field names based on your actual Denodo schema
       return rows.map((row, index) => ({
         labelId: row.label_id || row.labelId || `drug-${String(index + 1).padStart(3, '0')}`,
         drugName: row.drug_name || row.drugName || row.name || 'Unknown Drug',
-        snapshotDate: row.snapshot_date || row.snapshotDate || new Date().toISOString().split('T')[0],
+        snapshotDate: row.snapshot_date || row.snapshotDate || today,
         logoPath: row.logo_path || row.logoPath || '/drug-logos/default.svg',
       }));
     } catch (error) {
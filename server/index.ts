@@ -19,20 +19,32 @@ app.use(express.urlencoded({ extended: false }));
 app.use((req, res, next) => {
   const start = Date.now();
   const path = req.path;
-  let capturedJsonResponse: Record<string, any> | undefined = undefined;
+  let capturedJsonResponse: string | undefined = undefined;
+  let sendingJson = false;
 
+  // res.json serializes the body and hands the string to res.send, so the log
+  // reuses that string instead of running JSON.stringify a second time
   const originalResJson = res.json;
   res.json = function (bodyJson, ...args) {
-    capturedJsonResponse = bodyJson;
+    sendingJson = true;
     return originalResJson.apply(res, [bodyJson, ...args]);
   };
 
+  const originalResSend = res.send;
+  res.send = function (body, ...args) {
+    if (sendingJson && typeof body === "string") {
+      capturedJsonResponse = body;
+    }
+    sendingJson = false;
+    return originalResSend.apply(res, [body, ...args]);
+  };
+
   res.on("finish", () => {
     const duration = Date.now() - start;
     if (path.startsWith("/api")) {
       let logLine = `${req.method} ${path} ${res.statusCode} in ${duration}ms`;
       if (capturedJsonResponse) {
-        logLine += ` :: ${JSON.stringify(capturedJsonResponse)}`;
+        logLine += ` :: ${capturedJsonResponse}`;
       }
 
       if (logLine.length > 80) {
@@ -1,4 +1,5 @@
 import OpenAI from "openai";
+import { createHash } from "crypto";
 import type { DrugLabel, QueryResponse } from "@shared/schema";
 
 // Using Replit's AI Integrations service for OpenAI access (no API key required, billed to credits)
@@ -7,6 +8,9 @@ const openai = new OpenAI({
   apiKey: process.env.AI_INTEGRATIONS_OPENAI_API_KEY,
 });
 
+const OPENAI_MODEL = "gpt-4o-mini";
+const LABEL_DISCLAIMER = "Educational only — not medical advice. Consult your healthcare provider.";
+
 interface LabelChunk {
   text: string;
   startIndex: number;
@@ -33,6 +37,16 @@ function chunkText(text: string, chunkSize: number = 1500, overlap: number = 200
   return chunks;
 }
 
+// Score boosts for chunks containing key label sections
+const SECTION_BOOSTS = [
+  { pattern: /warnings|precautions/i, boost: 50 },
+  { pattern: /contraindications/i, boost: 50 },
+  { pattern: /adverse reactions|side effects/i, boost: 40 },
+  { pattern: /drug interactions/i, boost: 40 },
+  { pattern: /dosage|administration/i, boost: 30 },
+  { pattern: /indications|usage/i, boost: 30 },
+];
+
 function findRelevantChunks(
   chunks: LabelChunk[],
   question: string,
@@ -44,31 +58,29 @@ function findRelevantChunks(
     .replace(/[^\w\s]/g, '')
     .split(/\s+/)
     .filter(w => w.length > 3);
+
+  // Compile keyword patterns once per question rather than once per chunk.
+  // Keywords are already lowercase word characters and chunks are lowercased
+  // before matching, so no case-insensitive flag is needed.
+  const keywordPatterns = keywords.map(keyword => ({
+    regex: new RegExp(keyword, 'g'),
+    weight: keyword.length,
+  }));
   
   // Score chunks based on keyword presence
   const scoredChunks = chunks.map(chunk => {
     const chunkLower = chunk.text.toLowerCase();
     let score = 0;
     
-    keywords.forEach(keyword => {
-      const regex = new RegExp(keyword, 'gi');
+    keywordPatterns.forEach(({ regex, weight }) => {
       const matches = chunkLower.match(regex);
       if (matches) {
-        score += matches.length * keyword.length;
+        score += matches.length * weight;
       }
     });
     
     // Boost score for chunks containing key sections
-    const sectionBoosts = [
-      { pattern: /warnings|precautions/i, boost: 50 },
-      { pattern: /contraindications/i, boost: 50 },
-      { pattern: /adverse reactions|side effects/i, boost: 40 },
-      { pattern: /drug interactions/i, boost: 40 },
-      { pattern: /dosage|administration/i, boost: 30 },
-      { pattern: /indications|usage/i, boost: 30 },
-    ];
-    
-    sectionBoosts.forEach(({ pattern, boost }) => {
+    SECTION_BOOSTS.forEach(({ pattern, boost }) => {
       if (pattern.test(chunk.text)) {
         score += boost;
       }
@@ -151,10 +163,64 @@ function generateFollowUpQuestions(question: string): string[] {
   ];
 }
 
+// Cache of generated answers keyed by a hash of the label (including its text) + question.
+// Identical questions (retries, follow-up chips) skip the OpenAI round trips.
+const RESPONSE_CACHE_TTL_MS = 60 * 60 * 1000;
+const RESPONSE_CACHE_MAX_ENTRIES = 500;
+const responseCache = new Map<string, { response: QueryResponse; expiresAt: number }>();
+
+function getResponseCacheKey(label: DrugLabel, question: string): string {
+  // The same labelId/snapshotDate can arrive with different text (e.g. an empty
+  // Denodo text field, or the local-file fallback), so the text is part of the key
+  const labelTextHash = createHash('sha256').update(label.labelText).digest('hex');
+  return createHash('sha256')
+    .update(JSON.stringify([label.labelId, label.snapshotDate, labelTextHash, question.trim()]))
+    .digest('hex');
+}
+
 export async function queryLabel(
   label: DrugLabel,
   question: string
 ): Promise<QueryResponse> {
+  const startTime = Date.now();
+  const cacheKey = getResponseCacheKey(label, question);
+  const cached = responseCache.get(cacheKey);
+
+  if (cached && cached.expiresAt > Date.now()) {
+    // Report the time this request actually took, not the original generation time
+    const { provenance } = cached.response;
+    return provenance
+      ? { ...cached.response, provenance: { ...provenance, responseTime: (Date.now() - startTime) / 1000 } }
+      : cached.response;
+  }
+  responseCache.delete(cacheKey);
+
+  const { response, cacheable } = await generateLabelResponse(label, question);
+  if (!cacheable) {
+    return response;
+  }
+
+  // Evict the oldest entry once full (Map keeps insertion order)
+  if (responseCache.size >= RESPONSE_CACHE_MAX_ENTRIES) {
+    const oldestKey = responseCache.keys().next().value;
+    if (oldestKey !== undefined) {
+      responseCache.delete(oldestKey);
+    }
+  }
+  responseCache.set(cacheKey, { response, expiresAt: Date.now() + RESPONSE_CACHE_TTL_MS });
+
+  return response;
+}
+
+/**
+ * Generate an answer for a label question. `cacheable` is false when the
+ * result reflects a transient failure (e.g. the general-knowledge fallback
+ * errored) and must not be replayed from the response cache.
+ */
+async function generateLabelResponse(
+  label: DrugLabel,
+  question: string
+): Promise<{ response: QueryResponse; cacheable: boolean }> {
   const startTime = Date.now();
   const chunks = chunkText(label.labelText);
   const relevantChunks = findRelevantChunks(chunks, question);
@@ -192,7 +258,7 @@ If the label doesn't address the question, respond with:
 
   try {
     const completion = await openai.chat.completions.create({
-      model: "gpt-4o-mini",
+      model: OPENAI_MODEL,
       messages: [
         { role: "system", content: systemPrompt },
         { role: "user", content: userPrompt },
@@ -203,6 +269,7 @@ If the label doesn't address the question, respond with:
     });
 
     const response = JSON.parse(completion.choices[0].message.content || "{}");
+    let cacheable = true;
     
     // If not found in label, use general knowledge as fallback
     if (response.notFound) {
@@ -233,7 +300,7 @@ If you cannot provide a reliable answer, respond with:
 
       try {
         const generalCompletion = await openai.chat.completions.create({
-          model: "gpt-4o-mini",
+          model: OPENAI_MODEL,
           messages: [
             { role: "system", content: generalSystemPrompt },
             { role: "user", content: generalUserPrompt },
@@ -247,26 +314,28 @@ If you cannot provide a reliable answer, respond with:
         
         if (generalResponse.canAnswer) {
           const responseTime = (Date.now() - startTime) / 1000;
-          return {
+          const generalAnswer: QueryResponse = {
             evidence: [],
             summary: generalResponse.summary || "",
             labelId: label.labelId,
             drugName: label.drugName,
-            disclaimer: "Educational only — not medical advice. Consult your healthcare provider.",
+            disclaimer: LABEL_DISCLAIMER,
             notFound: false,
             sourceType: "general_knowledge" as const,
             provenance: {
               chunksSearched: chunks.length,
               relevantPassages: 0,
-              model: "gpt-4o-mini",
+              model: OPENAI_MODEL,
               responseTime,
               fallbackUsed: true,
             },
             followUpQuestions: generateFollowUpQuestions(question),
           };
+          return { response: generalAnswer, cacheable };
         }
       } catch (generalError) {
         console.error('Error using general knowledge fallback:', generalError);
+        cacheable = false;
       }
     }
     
@@ -274,24 +343,25 @@ If you cannot provide a reliable answer, respond with:
     const safetyInsights = extractSafetyInsights(label.labelText, question);
     const followUpQuestions = generateFollowUpQuestions(question);
     
-    return {
+    const labelAnswer: QueryResponse = {
       evidence: response.notFound ? [] : (response.evidence || []),
       summary: response.notFound ? "" : (response.summary || ""),
       labelId: label.labelId,
       drugName: label.drugName,
-      disclaimer: "Educational only — not medical advice. Consult your healthcare provider.",
+      disclaimer: LABEL_DISCLAIMER,
       notFound: response.notFound || false,
       sourceType: response.notFound ? undefined : ("label" as const),
       safetyInsights: response.notFound ? undefined : safetyInsights,
       provenance: response.notFound ? undefined : {
         chunksSearched: chunks.length,
         relevantPassages: relevantChunks.length,
-        model: "gpt-4o-mini",
+        model: OPENAI_MODEL,
         responseTime,
         fallbackUsed: false,
       },
       followUpQuestions,
     };
+    return { response: labelAnswer, cacheable };
   } catch (error) {
     console.error('Error querying OpenAI:', error);
     throw new Error('Failed to generate response');
@@ -1,6 +1,7 @@
 import type { Express } from "express";
 import { createServer, type Server } from "http";
-import { promises as fs } from "fs";
+import { promises as fs, createReadStream } from "fs";
+import { pipeline } from "stream/promises";
 import path from "path";
 import { queryRequestSchema, chatRequestSchema, type DrugIndexEntry, type DrugLabel, type ReadabilityScore } from "@shared/schema";
 import { queryLabel } from "./rag";
@@ -11,6 +12,8 @@ import { chatWithDenodoAI, isDenodoAIConfigured, getDenodoCredentialsByRole, get
 // Cache for labels and readability scores
 let drugIndex: DrugIndexEntry[] | null = null;
 let readabilityScores: ReadabilityScore[] | null = null;
+// Parsed local drug-index.json, shared by every local label lookup
+let localDrugIndex: Promise<DrugIndexEntry[]> | null = null;
 
 // Initialize Denodo client (will be null if credentials not configured)
 const denodoClient = createDenodoClient();
@@ -29,9 +32,15 @@ if (denodoClient) {
 }
 
 async function loadDrugIndexFromLocal(): Promise<DrugIndexEntry[]> {
-  const indexPath = path.join(process.cwd(), 'data', 'drug-index.json');
-  const content = await fs.readFile(indexPath, 'utf-8');
-  return JSON.parse(content);
+  if (!localDrugIndex) {
+    const indexPath = path.join(process.cwd(), 'data', 'drug-index.json');
+    localDrugIndex = fs.readFile(indexPath, 'utf-8').then(content => JSON.parse(content));
+    // Don't cache a failed read; the next call retries
+    localDrugIndex.catch(() => {
+      localDrugIndex = null;
+    });
+  }
+  return localDrugIndex;
 }
 
 async function loadDrugIndex(): Promise<DrugIndexEntry[]> {
@@ -55,7 +64,8 @@ async function loadDrugIndex(): Promise<DrugIndexEntry[]> {
   return drugIndex;
 }
 
-async function loadLabelFromLocal(labelId: string): Promise<DrugLabel> {
+// Find a drug in the local index and the path of its label file
+async function resolveLocalLabel(labelId: string): Promise<{ drug: DrugIndexEntry; labelPath: string }> {
   const index = await loadDrugIndexFromLocal();
   const drug = index.find(d => d.labelId === labelId);
   
@@ -64,6 +74,11 @@ async function loadLabelFromLocal(labelId: string): Promise<DrugLabel> {
   }
   
   const labelPath = path.join(process.cwd(), 'data', 'labels', `${labelId}.txt`);
+  return { drug, labelPath };
+}
+
+async function loadLabelFromLocal(labelId: string): Promise<DrugLabel> {
+  const { drug, labelPath } = await resolveLocalLabel(labelId);
   const labelText = await fs.readFile(labelPath, 'utf-8');
   
   return {
@@ -90,26 +105,47 @@ async function loadLabel(labelId: string): Promise<DrugLabel> {
   return loadLabelFromLocal(labelId);
 }
 
+// Max labels fetched at once when scoring readability (keeps Denodo load bounded)
+const READABILITY_CONCURRENCY = 8;
+
+// Download filename for a label; any character outside [A-Za-z0-9] becomes '_'
+function getLabelFilename(drugName: string): string {
+  return `${drugName.replace(/[^a-z0-9]/gi, '_')}_Label.txt`;
+}
+
 async function calculateAllReadability(): Promise<ReadabilityScore[]> {
   if (readabilityScores) return readabilityScores;
   
   const index = await loadDrugIndex();
-  const scores: ReadabilityScore[] = [];
+  const results: (ReadabilityScore | null)[] = new Array(index.length).fill(null);
+  let nextIndex = 0;
   
-  for (const drug of index) {
-    try {
-      const label = await loadLabel(drug.labelId);
-      const score = calculateReadability(
-        label.labelId,
-        label.drugName,
-        label.labelText,
-        label.snapshotDate
-      );
-      scores.push(score);
-    } catch (error) {
-      console.error(`Error calculating readability for ${drug.labelId}:`, error);
+  // Each worker pulls the next label until none are left, so at most
+  // READABILITY_CONCURRENCY label fetches are in flight at any time
+  const worker = async () => {
+    while (nextIndex < index.length) {
+      const i = nextIndex++;
+      const drug = index[i];
+      try {
+        const label = await loadLabel(drug.labelId);
+        results[i] = calculateReadability(
+          label.labelId,
+          label.drugName,
+          label.labelText,
+          label.snapshotDate
+        );
+      } catch (error) {
+        console.error(`Error calculating readability for ${drug.labelId}:`, error);
+      }
     }
-  }
+  };
+  
+  await Promise.all(
+    Array.from({ length: Math.min(READABILITY_CONCURRENCY, index.length) }, worker)
+  );
+  
+  // Preserve index order and drop labels that failed to load
+  const scores = results.filter((score): score is ReadabilityScore => score !== null);
   
   readabilityScores = scores;
   return scores;
@@ -163,15 +199,34 @@ export async function registerRoutes(app: Express): Promise<Server> {
   app.get("/api/download-label/:labelId", async (req, res) => {
     try {
       const { labelId } = req.params;
+
+      // Local files are streamed straight from disk instead of being read
+      // fully into memory first (labels can be 100KB+)
+      if (!denodoClient) {
+        const { drug, labelPath } = await resolveLocalLabel(labelId);
+        const { size } = await fs.stat(labelPath);
+        const filename = getLabelFilename(drug.drugName);
+
+        res.setHeader('Content-Type', 'text/plain; charset=utf-8');
+        res.setHeader('Content-Length', size);
+        res.setHeader('Content-Disposition', `attachment; filename="${filename}"`);
+        await pipeline(createReadStream(labelPath), res);
+        return;
+      }
+
       const label = await loadLabel(labelId);
       
-      const filename = `${label.drugName.replace(/[^a-z0-9]/gi, '_')}_Label.txt`;
+      const filename = getLabelFilename(label.drugName);
       
       res.setHeader('Content-Type', 'text/plain');
       res.setHeader('Content-Disposition', `attachment; filename="${filename}"`);
       res.send(label.labelText);
     } catch (error) {
       console.error('Error downloading label:', error);
+      if (res.headersSent) {
+        res.destroy();
+        return;
+      }
       res.status(500).json({ error: 'Failed to download label' });
     }
   });
@@ -222,7 +277,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
       // Call Denodo AI SDK with role-specific view filtering
       // App-level RBAC: Only allowed views will be queried
       const response = await chatWithDenodoAI(
-        messages, // Pass full conversation history
+        messages, // Recent conversation window (client sends the last 3 messages)
         databaseName, // Query against Denodo database
         roleCredentials, // Use Denodo credentials
         allowedViews // Restrict to allowed views for this role